@@ -1,6 +1,14 @@
 import yt_dlp
+import argparse
 import os
 import re
+import sys
+
+# Allow running as `python cli/downloader.py` as well as `python -m cli.downloader`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import profiling
+from renditions import RenditionExporter, STREAM_MUX_OPTIONS, STREAM_MUX_MULTI_QUALITY_NOTE
+import estimator
 
 # Define quality presets with their specifications
 QUALITY_PRESETS = {
@@ -14,6 +22,9 @@ QUALITY_PRESETS = {
     '240p':  {'resolution': '426x240',   'height': 240,  'label': 'SD', 'description': 'Very Low Definition'}
 }
 
+# Download speed measured across downloads in this session, used for time estimates
+throughput = estimator.ThroughputMeter()
+
 def get_format_height(format_dict):
     """
     Safely get the height from a format dictionary.
@@ -79,7 +90,7 @@ def list_available_formats(url):
             'no_warnings': True,
         }
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with profiling.profile_job("fetch"), yt_dlp.YoutubeDL(ydl_opts) as ydl:
             print("\nFetching video information...")
             info = ydl.extract_info(url, download=False)
             all_formats = info.get('formats', [])
@@ -109,9 +120,31 @@ def list_available_formats(url):
         print(f"Error fetching video information: {str(e)}")
         return []
 
-def download_youtube_video(url, output_path=None, quality='1080p'):
+def check_disk_space(info, qualities, output_path, stream_mux=False):
+    """
+    Print the size and time estimate and check that it fits on the target volume.
+    
+    Returns:
+        bool: False if the download would not fit
+    """
+    heights = [QUALITY_PRESETS[quality]['height'] for quality in qualities]
+    download_estimate = estimator.estimate(info, heights)
+    if download_estimate is None:
+        print("\nCould not estimate the download size.")
+        return True
+    
+    print(f"\n{download_estimate.describe(throughput.bytes_per_second)}")
+    free = estimator.free_bytes(output_path)
+    required = download_estimate.required_bytes(stream_mux)
+    if required > free:
+        print(f"Not enough disk space: needs about {estimator.format_bytes(required)}, {estimator.format_bytes(max(free, 0))} available.")
+        return False
+    return True
+
+def download_youtube_video(url, output_path=None, quality='1080p', stream_mux=False):
     """
     Download a YouTube video in specified quality.
+    With stream_mux, video and audio are muxed by ffmpeg as they arrive.
     """
     try:
         if quality not in QUALITY_PRESETS:
@@ -133,12 +166,18 @@ def download_youtube_video(url, output_path=None, quality='1080p'):
             'noplaylist': True,
             'quiet': False,
             'merge_output_format': 'mp4',
-            'progress_hooks': [lambda d: print(f"\rDownloading: {d['_percent_str']} of {d.get('_total_bytes_str', 'Unknown size')}", end='') if d['status'] == 'downloading' else None],
+            'progress_hooks': [lambda d: print(f"\rDownloading: {d['_percent_str']} of {d.get('_total_bytes_str', 'Unknown size')}", end='') if d['status'] == 'downloading' else None, throughput.hook],
         }
+        if stream_mux:
+            ydl_opts.update(STREAM_MUX_OPTIONS)
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with profiling.profile_job("download") as job, yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.add_postprocessor_hook(job.postprocessor_hook)
+            info = ydl.extract_info(url, download=False)
+            if not check_disk_space(info, [quality], output_path, stream_mux):
+                return None
             print(f"\nStarting download in {quality} ({QUALITY_PRESETS[quality]['description']})...")
-            info = ydl.extract_info(url, download=True)
+            info = ydl.process_ie_result(info, download=True)
             file_path = os.path.join(output_path, f"{info['title']} [{info.get('resolution', quality)}].mp4")
             print(f"\nDownload completed! Saved to: {file_path}")
             return file_path
@@ -147,10 +186,64 @@ def download_youtube_video(url, output_path=None, quality='1080p'):
         print(f"\nAn error occurred: {str(e)}")
         return None
 
+def download_youtube_renditions(url, output_path=None, qualities=('1080p',)):
+    """
+    Download several qualities of a YouTube video from one extraction,
+    sharing a single audio download between all renditions.
+    """
+    try:
+        qualities = [quality for quality in qualities if quality in QUALITY_PRESETS]
+        if not qualities:
+            print(f"Invalid quality selection. Using 1080p as default.")
+            qualities = ['1080p']
+        
+        if output_path is None:
+            output_path = os.getcwd()
+            
+        if not os.path.exists(output_path):
+            os.makedirs(output_path)
+        
+        ydl_opts = {
+            'outtmpl': os.path.join(output_path, '%(title)s [%(resolution)s].%(ext)s'),
+            'restrictfilenames': True,
+            'noplaylist': True,
+            'quiet': False,
+            'progress_hooks': [lambda d: print(f"\rDownloading: {d['_percent_str']} of {d.get('_total_bytes_str', 'Unknown size')}", end='') if d['status'] == 'downloading' else None, throughput.hook],
+        }
+        
+        with profiling.profile_job("download") as job, yt_dlp.YoutubeDL(dict(ydl_opts, quiet=True)) as ydl:
+            ydl_opts['postprocessor_hooks'] = [job.postprocessor_hook]
+            info = ydl.extract_info(url, download=False)
+            if not check_disk_space(info, qualities, output_path):
+                return None
+            print(f"\nStarting download in {', '.join(qualities)}...")
+            file_paths = RenditionExporter(ydl_opts, QUALITY_PRESETS, log=lambda message: print(f"\n{message}")).export(info, qualities)
+            print(f"\nDownload completed! Saved {len(file_paths)} renditions to: {output_path}")
+            return file_paths
+        
+    except Exception as e:
+        print(f"\nAn error occurred: {str(e)}")
+        return None
+
 def main():
     """
     Main function to run the interactive YouTube downloader.
     """
+    parser = argparse.ArgumentParser(description="YouTube Video Downloader")
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help=f"write cProfile dumps and memory summaries for every job to DIR (or set {profiling.PROFILE_ENV_VAR})",
+    )
+    parser.add_argument(
+        "--stream-mux",
+        action="store_true",
+        help="pipe video and audio straight into ffmpeg instead of merging temporary files",
+    )
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable(args.profile)
+
     print("=== YouTube Video Downloader ===")
     print("Supported qualities: 8K, 4K, 2K, 1080p, 720p, 480p, 360p, 240p")
     
@@ -176,13 +269,14 @@ def main():
         for i, quality, specs in available_qualities:
             print(f"{i-1}. {quality} ({specs['resolution']}) - {specs['description']}")
         
-        # Get user selection
+        # Get user selection (comma separated for several renditions)
         while True:
             try:
                 default_choice = min(2, len(available_qualities))
-                choice = int(input(f"\nEnter quality number [default: {default_choice} for {available_qualities[default_choice-1][1]}]: ").strip() or str(default_choice))
-                if 1 <= choice <= len(available_qualities):
-                    selected_quality = available_qualities[choice-1][1]
+                answer = input(f"\nEnter quality number(s), comma separated [default: {default_choice} for {available_qualities[default_choice-1][1]}]: ").strip() or str(default_choice)
+                choices = [int(part) for part in answer.split(',')]
+                if all(1 <= choice <= len(available_qualities) for choice in choices):
+                    selected_qualities = list(dict.fromkeys(available_qualities[choice-1][1] for choice in choices))
                     break
                 else:
                     print("Invalid selection. Please try again.")
@@ -190,7 +284,12 @@ def main():
                 print("Please enter a valid number.")
         
         output_dir = input("\nEnter output directory [default: downloads]: ").strip() or "downloads"
-        result = download_youtube_video(url, output_dir, selected_quality)
+        if len(selected_qualities) > 1:
+            if args.stream_mux:
+                print(STREAM_MUX_MULTI_QUALITY_NOTE)
+            result = download_youtube_renditions(url, output_dir, selected_qualities)
+        else:
+            result = download_youtube_video(url, output_dir, selected_qualities[0], stream_mux=args.stream_mux)
         
         if input("\nDownload another video? (y/n): ").lower() != 'y':
             break
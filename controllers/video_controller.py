@@ -1,14 +1,21 @@
 from models.video_info import VideoInfo
 from models.state import State
+from models.playlist_items import PlaylistItems
+from profiling import profile_job
+from renditions import RenditionExporter, STREAM_MUX_OPTIONS, STREAM_MUX_MULTI_QUALITY_NOTE
+import estimator
 import yt_dlp
+from yt_dlp.postprocessor import MoveFilesAfterDownloadPP
 import threading
 import os
 
 class VideoController:
-    def __init__(self, state : State, video_info : VideoInfo, gui):
+    def __init__(self, state : State, video_info : VideoInfo, gui, playlist_items : PlaylistItems):
           self.state = state
           self.video_info = video_info
           self.gui = gui
+          self.playlist_items = playlist_items
+          self.throughput = estimator.ThroughputMeter()
 
     def fetch_video_info(self, as_playlist: bool = False):
             """Fetch video information from YouTube"""
@@ -25,46 +32,82 @@ class VideoController:
             self.gui.log(f"Fetching video information for URL: {url}")
 
             def fetch():
-                fetched_ok = False
-                try:
-                    ydl_opts = {
-                    'quiet': True,
-                    'no_warnings': True,
-                    'noplaylist': not as_playlist,
-                    }
+                with profile_job("fetch"):
+                    fetched_ok = False
+                    try:
+                        ydl_opts = {
+                        'quiet': True,
+                        'no_warnings': True,
+                        'noplaylist': not as_playlist,
+                        }
 
-                    if as_playlist:
-                        # Flat extraction keeps playlist fetch fast while still returning entry count/title.
-                        ydl_opts['extract_flat'] = True
+                        if as_playlist:
+                            # Flat extraction keeps playlist fetch fast while still returning entry count/title.
+                            ydl_opts['extract_flat'] = True
                 
-                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                        self.video_info.fetched_info = ydl.extract_info(url, download=False)
-                        print(self.video_info)
-                        fetched_ok = True
+                        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                            fetched_info = ydl.extract_info(url, download=False)
+                            # None marks the playlist samples as pending until sample_playlist is done
+                            self.video_info.sampled_entries = None if fetched_info.get('_type') == 'playlist' else []
+                            self.video_info.fetched_info = fetched_info
+                            self.playlist_items.load(fetched_info.get('entries') or [])
+                            print(self.video_info)
+                            fetched_ok = True
                     
 
-                        # Update GUI in main thread
-                        # self.root.after(0, self.update_video_info)
+                            # Update GUI in main thread
+                            # self.root.after(0, self.update_video_info)
                     
-                except Exception as e:
-                    print(f"Error fetching video info: {str(e)}")
-                    self.gui.log(f"Error fetching video info: {str(e)}")
-                    self.gui.show_error(f"Error fetching video info: {str(e)}")
-                finally:
-                    if fetched_ok:
-                        self.state.state = "fetched"
-                        # Update GUI in main thread
-                        self.gui.revalitade_ui()
+                    except Exception as e:
+                        print(f"Error fetching video info: {str(e)}")
+                        self.gui.log(f"Error fetching video info: {str(e)}")
+                        self.gui.show_error(f"Error fetching video info: {str(e)}")
+                    finally:
+                        if fetched_ok:
+                            self.state.state = "fetched"
+                            # Update GUI in main thread
+                            self.gui.revalitade_ui()
+
+                # Sampled after the info is shown, so the fetch itself stays as fast as the flat extraction
+                if fetched_ok and self.video_info.sampled_entries is None:
+                    self.sample_playlist(fetched_info)
         
             # Start fetching in a separate thread
             threading.Thread(target=fetch, daemon=True).start()
 
-    def start_download(self, quality, output_path, quality_presets, download_playlist: bool = False):
-        """Start video download process"""
-        if not self.video_info or not self.video_info.url:
+    def sample_playlist(self, fetched_info: dict):
+        """Fully extract a few playlist entries for the size estimate, then refresh it."""
+        self.gui.log("Sampling playlist entries for the size estimate...")
+        try:
+            with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
+                samples = estimator.sample_entries(ydl, fetched_info)
+        except Exception as e:
+            self.gui.log(f"Error sampling playlist entries: {str(e)}")
+            samples = []
+
+        # Drop the samples if the playlist was reset or replaced in the meantime
+        if self.video_info.fetched_info is fetched_info:
+            self.video_info.sampled_entries = samples
+            self.gui.update_estimate()
+
+    def estimate_ready(self) -> bool:
+        """Check that the playlist samples the estimate depends on have arrived."""
+        return self.video_info.sampled_entries is not None
+
+    def start_download(self, qualities, output_path, quality_presets, download_playlist: bool = False, stream_mux: bool = False, max_entries=None):
+        """Start video download process.
+
+        With more than one quality the video is extracted once and every
+        rendition is muxed against a single shared audio download. With
+        stream_mux a single quality is piped into ffmpeg instead of being
+        written to disk as separate streams and merged afterwards.
+        max_entries limits a playlist to its leading entries, as returned
+        by `estimate_download`.
+        """
+        if not self.video_info or not self.video_info.url or not qualities:
             return
         
-        self.quality = quality
+        self.qualities = qualities
         self.output_path = output_path.strip()
         self.quality_presets = quality_presets
         
@@ -80,8 +123,29 @@ class VideoController:
         
         # self.progress_var.set(0)
         
+        if download_playlist:
+            self.playlist_items.reset(", ".join(qualities))
+            if max_entries is not None:
+                # Entries past the ones that fit on disk are not downloaded
+                for position in range(max_entries, len(self.playlist_items)):
+                    self.playlist_items.update(playlist_index=position + 1, status='skipped')
+        started_ids = set()
+        # Sizes per entry and stream: bestvideo+bestaudio reports each stream separately
+        stream_sizes = {}
+
         def download_progress_hook(d):
+            info = d.get('info_dict') or {}
+            item = {'item_id': info.get('id'), 'playlist_index': info.get('playlist_index')}
             if d['status'] == 'downloading':
+                started_ids.add(info.get('id'))
+                sizes = stream_sizes.setdefault(info.get('id'), {})
+                sizes[info.get('format_id')] = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+                self.playlist_items.update(
+                    **item,
+                    size=sum(sizes.values()) or None,
+                    speed=d.get('speed'),
+                    status='downloading',
+                )
                 try:
                     # Log progress to the log widget
                     self.gui.log(f"Downloading: {d['_percent_str']} of {d.get('_total_bytes_str', 'Unknown size')}")
@@ -89,37 +153,142 @@ class VideoController:
                 except:
                     pass
             elif d['status'] == 'finished':
+                if info.get('id') not in started_ids and d.get('elapsed') is not None:
+                    # External downloaders (ffmpeg for stream mux) only report this one event, with the elapsed time
+                    started_ids.add(info.get('id'))
+                    self.playlist_items.update(**item, size=d.get('total_bytes'), speed=d.get('speed'), status='downloading')
+                    self.gui.log(f"Downloaded {d.get('_total_bytes_str', 'Unknown size').strip()} in {d.get('_elapsed_str', 'unknown time')}")
+                if info.get('id') not in started_ids:
+                    # yt-dlp reports files that already exist as finished without downloading them
+                    self.playlist_items.update(**item, status='skipped')
                 self.gui.log("Download completed! Processing video...")
+
+        def postprocessor_hook(d):
+            # Moving files into place is the last step once all streams are merged and post-processed.
+            # Multi-quality exports move every intermediate stream, so they mark entries done themselves.
+            if d['status'] == 'finished' and d.get('postprocessor') == MoveFilesAfterDownloadPP.pp_key() and len(qualities) == 1:
+                info = d.get('info_dict') or {}
+                if info.get('id') in started_ids:
+                    # The info here is merged from every requested stream, unlike the per-stream progress hook
+                    self.playlist_items.update(
+                        item_id=info.get('id'),
+                        playlist_index=info.get('playlist_index'),
+                        format=info.get('resolution') or info.get('format_id') or qualities[0],
+                        speed=None,
+                        status='done',
+                    )
         
         def download():
-            try:
-                target_height = self.quality_presets[quality]['height']
-                output_template = '%(title)s [%(resolution)s].%(ext)s'
-                if download_playlist:
-                    output_template = '%(playlist_title)s/%(playlist_index)s - %(title)s [%(resolution)s].%(ext)s'
-
-                ydl_opts = {
-                    'format': f'bestvideo[height<={target_height}]+bestaudio/best[height<={target_height}]',
-                    'outtmpl': os.path.join(output_path, output_template),
-                    'restrictfilenames': True,
-                    'noplaylist': not download_playlist,
-                    'ignoreerrors': download_playlist,
-                    'quiet': False,
-                    'merge_output_format': 'mp4',
-                    'progress_hooks': [download_progress_hook],
-                }
+            download_started = False
+            with profile_job("download") as job:
+                try:
+                    target_height = self.quality_presets[qualities[0]]['height']
+                    output_template = '%(title)s [%(resolution)s].%(ext)s'
+                    if download_playlist:
+                        output_template = '%(playlist_title)s/%(playlist_index)s - %(title)s [%(resolution)s].%(ext)s'
+
+                    ydl_opts = {
+                        'format': f'bestvideo[height<={target_height}]+bestaudio/best[height<={target_height}]',
+                        'outtmpl': os.path.join(output_path, output_template),
+                        'restrictfilenames': True,
+                        'noplaylist': not download_playlist,
+                        'ignoreerrors': download_playlist,
+                        'quiet': False,
+                        'merge_output_format': 'mp4',
+                        'progress_hooks': [download_progress_hook, self.throughput.hook],
+                        'postprocessor_hooks': [postprocessor_hook, job.postprocessor_hook],
+                    }
                 
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([self.video_info.url])
+                    if stream_mux and len(qualities) > 1:
+                        self.gui.log(STREAM_MUX_MULTI_QUALITY_NOTE)
+                    elif stream_mux:
+                        ydl_opts.update(STREAM_MUX_OPTIONS)
+                        self.gui.log("Stream muxing through ffmpeg; progress is reported as each video finishes.")
+
+                    if max_entries is not None:
+                        ydl_opts['playlist_items'] = f'1-{max_entries}'
+
+                    download_started = True
+                    if len(qualities) > 1:
+                        self.export_renditions(ydl_opts, qualities, download_playlist, max_entries)
+                    else:
+                        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                            ydl.download([self.video_info.url])
                 
-                self.gui.download_complete() 
-                self.gui.log("Download complete!")
+                    self.gui.download_complete() 
+                    self.gui.log("Download complete!")
 
-            except Exception as e:
-                self.gui.log(f"Error during download: {str(e)}")
-                self.gui.show_error(f"Error during download: {str(e)}")
+                except Exception as e:
+                    self.gui.log(f"Error during download: {str(e)}")
+                    self.gui.show_error(f"Error during download: {str(e)}")
+                finally:
+                    # Close out the rows on failure too, so none stay "downloading"
+                    if download_playlist and download_started:
+                        self.playlist_items.finish()
         
         # Start download in a separate thread
         self.download_thread = threading.Thread(target=download, daemon=True)
         self.download_thread.start()
-     
\ No newline at end of file
+
+    def estimate_download(self, qualities, output_path, quality_presets, download_playlist: bool = False, stream_mux: bool = False):
+        """Estimate the size and time of a download and check it against the free space on the target volume.
+
+        Uses the fetched info and the entries sampled while fetching, so it is
+        cheap enough to run on every option change. Returns (summary, max_entries)
+        where max_entries is None to download everything, the number of leading
+        playlist entries that fit, or 0 when the download does not fit at all.
+        """
+        if not qualities:
+            return "No quality selected.", None
+        if not self.estimate_ready():
+            return "Estimating size...", None
+
+        heights = [quality_presets[quality]['height'] for quality in qualities]
+        download_estimate = estimator.estimate(self.video_info.fetched_info, heights, self.video_info.sampled_entries)
+        if download_estimate is None:
+            return "Estimated size: unknown", None
+
+        summary = download_estimate.describe(self.throughput.bytes_per_second)
+        # Multiple qualities never stream mux, see STREAM_MUX_MULTI_QUALITY_NOTE
+        stream_mux = stream_mux and len(qualities) == 1
+        free = estimator.free_bytes(output_path)
+        required = download_estimate.required_bytes(stream_mux)
+        if required <= free:
+            return summary, None
+
+        summary += f"\nNot enough disk space: needs about {estimator.format_bytes(required)}, {estimator.format_bytes(max(free, 0))} available."
+        fit = download_estimate.entries_that_fit(free, stream_mux) if download_playlist else 0
+        if fit:
+            summary += f" Only the first {fit} of {len(download_estimate.entry_bytes)} items will be downloaded."
+        return summary, fit
+
+    def export_renditions(self, ydl_opts, qualities, download_playlist: bool = False, max_entries=None):
+        """Export several qualities per video, reusing the fetched info where it has formats."""
+        exporter = RenditionExporter(ydl_opts, self.quality_presets, log=self.gui.log)
+        fetched_info = self.video_info.fetched_info
+
+        if not download_playlist:
+            info = fetched_info
+            if not info.get('formats'):
+                with yt_dlp.YoutubeDL(dict(ydl_opts, quiet=True)) as ydl:
+                    info = ydl.extract_info(self.video_info.url, download=False)
+            exporter.export(info, qualities)
+            return
+
+        # Playlist fetches are flat, so each entry is extracted once here and shared by all renditions
+        entries = fetched_info.get('entries') or []
+        with yt_dlp.YoutubeDL(dict(ydl_opts, quiet=True, ignoreerrors=False)) as ydl:
+            for position, entry in enumerate(entries[:max_entries]):
+                entry = entry or {}
+                playlist_index = entry.get('playlist_index') or position + 1
+                try:
+                    info = ydl.extract_info(entry.get('url') or entry.get('id'), download=False)
+                    info['playlist_title'] = fetched_info.get('title')
+                    info['playlist_index'] = playlist_index
+                    # yt-dlp pads %(playlist_index)s to the width of the last index
+                    info['__last_playlist_index'] = len(entries)
+                    exporter.export(info, qualities)
+                    self.playlist_items.update(item_id=entry.get('id'), playlist_index=playlist_index, speed=None, status='done')
+                except Exception as e:
+                    self.gui.log(f"Error downloading {entry.get('title') or playlist_index}: {str(e)}")
+                    self.playlist_items.update(item_id=entry.get('id'), playlist_index=playlist_index, speed=None, status='failed')
@@ -0,0 +1,196 @@
+import os
+import random
+import shutil
+from typing import Optional
+
+# Entries fully extracted to estimate a flat playlist
+PLAYLIST_SAMPLE_SIZE = 5
+# Free space kept back on the target volume
+DISK_HEADROOM_BYTES = 200 * 1024 * 1024
+SPEED_SMOOTHING = 0.2
+
+def format_bytes(value) -> str:
+    """Format a byte count for display."""
+    if value is None:
+        return "unknown size"
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}" if unit != "B" else f"{int(value)} B"
+        value /= 1024
+    return f"{value:.1f} TiB"
+
+def format_duration(seconds) -> str:
+    """Format a duration in seconds as h:mm:ss."""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+def format_size(fmt: dict, duration) -> Optional[float]:
+    """Size of one format from filesize, filesize_approx or bitrate and duration."""
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if size:
+        return size
+    if fmt.get('tbr') and duration:
+        # tbr is in kbit/s
+        return fmt['tbr'] * 1000 / 8 * duration
+    return None
+
+def _best(formats: list, key):
+    return max(formats, key=key, default=None)
+
+def video_bytes(info: dict, heights: list) -> Optional[float]:
+    """Estimate the bytes written for one extracted video at each target height.
+
+    Mirrors the bestvideo[height<=h]+bestaudio/best[height<=h] selection closely
+    enough for an estimate; multiple heights share a single audio stream.
+    """
+    duration = info.get('duration')
+    formats = info.get('formats') or [info]
+    has_video = lambda f: f.get('vcodec') != 'none' and f.get('height')
+    video_only = [f for f in formats if has_video(f) and f.get('acodec') == 'none']
+    combined = [f for f in formats if has_video(f) and f.get('acodec') not in (None, 'none')]
+    audio_only = [f for f in formats if f.get('vcodec') == 'none' and f.get('acodec') not in (None, 'none')]
+
+    audio = _best(audio_only, key=lambda f: (f.get('abr') or f.get('tbr') or 0))
+    total = 0
+    found = False
+    needs_audio = False
+    seen = set()
+    for height in heights:
+        # bestvideo+bestaudio first, falling back to a combined format, then to whatever video exists
+        candidates = [f for f in video_only if f['height'] <= height] if audio else []
+        candidates = candidates or [f for f in combined if f['height'] <= height]
+        candidates = candidates or [f for f in video_only if f['height'] <= height]
+        fmt = _best(candidates, key=lambda f: (f['height'], f.get('tbr') or 0))
+        if fmt is None or fmt.get('format_id') in seen:
+            continue
+        seen.add(fmt.get('format_id'))
+        needs_audio = needs_audio or fmt.get('acodec') == 'none'
+        size = format_size(fmt, duration)
+        if size is not None:
+            total += size
+            found = True
+    if needs_audio and audio:
+        total += format_size(audio, duration) or 0
+    return total if found else None
+
+class DownloadEstimate:
+    """Predicted size of a download job, per entry so a playlist can be trimmed."""
+
+    def __init__(self, entry_bytes: list, sampled: bool = False):
+        self.entry_bytes = entry_bytes
+        self.sampled = sampled
+
+    @property
+    def total_bytes(self) -> float:
+        return sum(self.entry_bytes)
+
+    def required_bytes(self, stream_mux: bool = False) -> float:
+        """Peak disk usage: all outputs, plus the separate streams of the largest entry while it merges."""
+        merge_overhead = 0 if stream_mux else max(self.entry_bytes, default=0)
+        return self.total_bytes + merge_overhead
+
+    def seconds(self, bytes_per_second) -> Optional[float]:
+        """Expected transfer time at the given throughput."""
+        if not bytes_per_second:
+            return None
+        return self.total_bytes / bytes_per_second
+
+    def entries_that_fit(self, free_bytes: float, stream_mux: bool = False) -> int:
+        """Number of leading entries whose download fits in the given free space."""
+        used = 0
+        largest = 0
+        for count, size in enumerate(self.entry_bytes):
+            largest = max(largest, size)
+            if used + size + (0 if stream_mux else largest) > free_bytes:
+                return count
+            used += size
+        return len(self.entry_bytes)
+
+    def describe(self, bytes_per_second=None) -> str:
+        """One-line summary for logs and prompts."""
+        text = f"Estimated size: {'~' if self.sampled else ''}{format_bytes(self.total_bytes)}"
+        if len(self.entry_bytes) > 1:
+            text += f" for {len(self.entry_bytes)} items"
+        seconds = self.seconds(bytes_per_second)
+        if seconds is not None:
+            text += f", about {format_duration(seconds)} at {format_bytes(bytes_per_second)}/s"
+        else:
+            text += ", time unknown until a download speed is measured"
+        return text
+
+def sample_entries(ydl, info: dict) -> list:
+    """Fully extract a few entries of a flat playlist for `estimate`.
+
+    This is the only part of an estimate that needs the network, so it runs
+    once after fetching and the samples are reused for every quality choice.
+    """
+    entries = [entry or {} for entry in info.get('entries') or []]
+    samples = []
+    for entry in random.sample(entries, min(PLAYLIST_SAMPLE_SIZE, len(entries))):
+        try:
+            entry_info = ydl.extract_info(entry.get('url') or entry.get('id'), download=False)
+        except Exception:
+            continue
+        if entry_info:
+            samples.append(entry_info)
+    return samples
+
+def estimate(info: dict, heights: list, samples: Optional[list] = None) -> Optional[DownloadEstimate]:
+    """Estimate a fetched video or playlist.
+
+    Flat playlist entries carry no formats, so the bytes per second of duration
+    of the sampled entries are applied to the rest.
+    """
+    if info.get('_type') != 'playlist':
+        size = video_bytes(info, heights)
+        return DownloadEstimate([size]) if size is not None else None
+
+    entries = [entry or {} for entry in info.get('entries') or []]
+    if not entries:
+        return None
+
+    sampled_bytes = []
+    sampled_duration = 0
+    for entry_info in samples or []:
+        size = video_bytes(entry_info, heights)
+        if size is not None:
+            sampled_bytes.append(size)
+            sampled_duration += entry_info.get('duration') or 0
+    if not sampled_bytes:
+        return None
+
+    mean_bytes = sum(sampled_bytes) / len(sampled_bytes)
+    bytes_per_second = sum(sampled_bytes) / sampled_duration if sampled_duration else None
+    entry_bytes = [
+        entry['duration'] * bytes_per_second if entry.get('duration') and bytes_per_second else mean_bytes
+        for entry in entries
+    ]
+    return DownloadEstimate(entry_bytes, sampled=True)
+
+def free_bytes(path: str) -> float:
+    """Free space on the volume that will hold the path, minus the headroom."""
+    path = os.path.abspath(path)
+    # The output directory may not exist yet; check the nearest existing parent
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    return shutil.disk_usage(path).free - DISK_HEADROOM_BYTES
+
+class ThroughputMeter:
+    """yt-dlp progress hook that keeps a smoothed download speed for time estimates."""
+
+    def __init__(self):
+        self.bytes_per_second: Optional[float] = None
+
+    def hook(self, d):
+        speed = d.get('speed')
+        if d['status'] == 'finished' and d.get('elapsed') and d.get('total_bytes'):
+            # External downloaders such as ffmpeg only report the finished event
+            speed = speed or d['total_bytes'] / d['elapsed']
+        elif d['status'] != 'downloading':
+            return
+        if not speed:
+            return
+        if self.bytes_per_second is None:
+            self.bytes_per_second = speed
+        else:
+            self.bytes_per_second += SPEED_SMOOTHING * (speed - self.bytes_per_second)
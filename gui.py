@@ -2,8 +2,12 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from models.video_info import VideoInfo
 from models.state import State
+from models.view_model import ViewModel
+from models.playlist_items import PlaylistItems
+from views.playlist_table import PlaylistTable
 from controllers.video_controller import VideoController
 import os
+import threading
 
 class GUI:
 
@@ -22,7 +26,8 @@ class GUI:
     def __init__(self):
         self.state = State()        
         self.video_info = VideoInfo()
-        self.video_controller = VideoController(self.state, self.video_info, self)
+        self.playlist_items = PlaylistItems()
+        self.video_controller = VideoController(self.state, self.video_info, self, self.playlist_items)
 
         self.root = tk.Tk()
         self.setup()
@@ -60,7 +65,7 @@ class GUI:
         )
         playlist_mode_check.pack(side=tk.RIGHT, padx=5)
 
-        # URL fetch button
+        # Submit buttons
         self.setup_submit_button(self.url_frame)
 
         # Video Infro Frame
@@ -86,128 +91,154 @@ class GUI:
         # Set min size
         self.root.minsize(400, 200)
 
+        # Fill the persistent widgets from the initial state
+        self.view_model = None
+        self.revalitade_ui()
+
     def setup_submit_button(self, parent_frame : ttk.LabelFrame):
-        """Setup submit button based on the current state."""
-        # Remove any existing buttons
-        for child in parent_frame.winfo_children():
-            if isinstance(child, ttk.Button):
-                child.destroy()
-
-        if self.state.state == "fetched":
-            download_text = "Download Playlist" if self.playlist_mode_var.get() else "Download"
-            submit_button = ttk.Button(parent_frame, text=download_text, command=self.download_video)
-            submit_button.pack(side=tk.RIGHT, padx=5, pady=5)
-
-            reset_button = ttk.Button(parent_frame, text="Reset", command=self.reset)
-            reset_button.pack(side=tk.RIGHT, padx=5, pady=5)
-        else:
-           url_fetch_button = ttk.Button(parent_frame, text="Fetch video", command=self.fetch_video_info)
-           url_fetch_button.pack(side=tk.RIGHT, padx=4)  
+        """Create the fetch, download and reset buttons once; revalidation only packs the relevant ones."""
+        self.fetch_button = ttk.Button(parent_frame, text="Fetch video", command=self.fetch_video_info)
+        self.download_button = ttk.Button(parent_frame, text="Download", command=self.download_video)
+        self.reset_button = ttk.Button(parent_frame, text="Reset", command=self.reset)
 
     def setup_quality_options(self, parent_frame : ttk.LabelFrame) : 
-        """Setup quality options based on the current state."""
-        self.destroy_children(parent_frame)
-        if self.state.state == "fetched":
-
-            # Quality frame row
-            quality_frame_row = ttk.Frame(parent_frame)
-            quality_frame_row.pack(fill=tk.X, pady=5)
-
-            quality_label = ttk.Label(quality_frame_row, text="Select Quality : ")
-            quality_label.pack(side=tk.LEFT, padx=5)
-            self.quality_combo = ttk.Combobox(quality_frame_row, state="readonly")
-            self.quality_combo.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5, pady=5)
-
-            # For playlist mode, use all presets because per-video formats vary inside a playlist.
-            quality_options = []
-            if self.playlist_mode_var.get():
-                quality_options = [f"{quality} - {specs['description']}" for quality, specs in self.QUALITY_PRESETS.items()]
-            else:
-                # Update quality options based on available formats
-                formats = self.video_info.fetched_info.get("formats", [])
-                available_heights = set()
-                for f in formats:
-                    if f.get('vcodec') != 'none' and f.get('height'):
-                        available_heights.add(f.get('height'))
-
-                # Filter and sort quality options
-                for quality, specs in self.QUALITY_PRESETS.items():
-                    if specs['height'] <= max(available_heights, default=0):
-                        quality_options.append(f"{quality} - {specs['description']}")
-            
-            self.quality_combo["values"] = quality_options
-            if quality_options:
-                self.quality_combo.set(quality_options[0])
-
-            # Save to path frane row
-            save_to_frame_row = ttk.Frame(parent_frame)
-            save_to_frame_row.pack(fill=tk.X, pady=5)
-
-            save_to_label = ttk.Label(save_to_frame_row, text="Save To : ")
-            save_to_label.pack(side=tk.LEFT, padx=5)
-
-            self.path_entry_var = tk.StringVar(value=os.path.expanduser("~/Downloads"))
-            path_entry = ttk.Entry(save_to_frame_row, textvariable=self.path_entry_var)
-            path_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
-
-            path_browse_button = ttk.Button(save_to_frame_row, text="Browse", command=self.browse_directory)
-            path_browse_button.pack(side=tk.RIGHT, padx=5)
-
-
-        elif self.state.state == "fetching":
-            loading_label = ttk.Label(parent_frame, text="Loading...")
-            loading_label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
-        elif self.state.state == "error":
-            error_label = ttk.Label(parent_frame, text="Fetch Failed")
-            error_label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
-        else :
-            info_label = ttk.Label(parent_frame, text="Enter a valid URL and fetch video info to see quality options.")
-            info_label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
+        """Create the quality and save path rows once; revalidation toggles them against the message label."""
+        self.options_message_label = ttk.Label(parent_frame)
+
+        # Quality frame row
+        self.quality_frame_row = ttk.Frame(parent_frame)
+
+        quality_label = ttk.Label(self.quality_frame_row, text="Select Quality : ")
+        quality_label.pack(side=tk.LEFT, anchor=tk.N, padx=5)
+        # Selecting several qualities exports every rendition against one shared audio download
+        self.quality_list = tk.Listbox(self.quality_frame_row, selectmode=tk.MULTIPLE, exportselection=False, height=4)
+        self.quality_list.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5, pady=5)
+        self.quality_list.bind("<<ListboxSelect>>", lambda event: self.update_estimate())
+
+        # Save to path frane row
+        self.save_to_frame_row = ttk.Frame(parent_frame)
+
+        save_to_label = ttk.Label(self.save_to_frame_row, text="Save To : ")
+        save_to_label.pack(side=tk.LEFT, padx=5)
+
+        self.path_entry_var = tk.StringVar(value=os.path.expanduser("~/Downloads"))
+        self.path_entry_var.trace_add("write", lambda *args: self.update_estimate())
+        path_entry = ttk.Entry(self.save_to_frame_row, textvariable=self.path_entry_var)
+        path_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
+        path_browse_button = ttk.Button(self.save_to_frame_row, text="Browse", command=self.browse_directory)
+        path_browse_button.pack(side=tk.RIGHT, padx=5)
+
+        # Advanced options row
+        self.advanced_frame_row = ttk.Frame(parent_frame)
+
+        self.stream_mux_var = tk.BooleanVar(value=False)
+        stream_mux_check = ttk.Checkbutton(
+            self.advanced_frame_row,
+            text="Stream mux through ffmpeg (no temporary stream files)",
+            variable=self.stream_mux_var,
+            command=self.update_estimate,
+        )
+        stream_mux_check.pack(side=tk.LEFT, padx=5)
+
+        # Size, time and free space estimate for the current selection
+        self.estimate_label = ttk.Label(parent_frame, justify=tk.LEFT)
             
     def setup_video_info_frame(self, parent_frame : ttk.LabelFrame):
-        """Setup video info display based on the current state."""
-        self.destroy_children(parent_frame)
-        if self.state.state == "fetching" :
-            loading_label = ttk.Label(parent_frame, text="Loading...")
-            loading_label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
-        elif self.state.state == "fetched":
-            fetched_type = self.video_info.fetched_info.get('_type')
-            mode_text = "Mode : Playlist" if fetched_type == 'playlist' else "Mode : Video"
-            mode_label = ttk.Label(parent_frame, text=mode_text)
-            mode_label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
-
-            if fetched_type == 'playlist':
-                title_label = ttk.Label(parent_frame, text=f"Playlist : {self.video_info.fetched_info.get('title', 'N/A')}")
-                title_label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
-
-                entries = self.video_info.fetched_info.get('entries') or []
-                count_label = ttk.Label(parent_frame, text=f"Items : {len(entries)}")
-                count_label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
-
-                uploader_label = ttk.Label(parent_frame, text=f"Uploader : {self.video_info.fetched_info.get('uploader', 'N/A')}")
-                uploader_label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
+        """Create the info label pool and the per-item playlist table."""
+        # Labels live in their own frame so re-packing them never moves them below the table
+        self.info_lines_frame = ttk.Frame(parent_frame)
+        self.info_lines_frame.pack(side=tk.TOP, fill=tk.X)
+        self.info_labels = []
+
+        self.playlist_table = PlaylistTable(parent_frame, self.playlist_items)
+
+    def update_submit_button(self, view_model : ViewModel, changed : set):
+        """Show the buttons matching the submit mode and refresh the download label."""
+        if "download_text" in changed:
+            self.download_button.config(text=view_model.download_text)
+
+        if "submit_mode" in changed:
+            if view_model.submit_mode == "download":
+                self.fetch_button.pack_forget()
+                self.download_button.pack(side=tk.RIGHT, padx=5, pady=5)
+                self.reset_button.pack(side=tk.RIGHT, padx=5, pady=5)
+            else:
+                self.download_button.pack_forget()
+                self.reset_button.pack_forget()
+                self.fetch_button.pack(side=tk.RIGHT, padx=4)
+
+    def update_quality_options(self, view_model : ViewModel, changed : set):
+        """Toggle the option rows and refresh the quality list in place."""
+        if "options_message" in changed:
+            self.options_message_label.config(text=view_model.options_message)
+
+        if "options_visible" in changed:
+            if view_model.options_visible:
+                self.options_message_label.pack_forget()
+                self.quality_frame_row.pack(fill=tk.X, pady=5)
+                self.save_to_frame_row.pack(fill=tk.X, pady=5)
+                self.advanced_frame_row.pack(fill=tk.X, pady=5)
+                self.estimate_label.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
+            else:
+                self.quality_frame_row.pack_forget()
+                self.save_to_frame_row.pack_forget()
+                self.advanced_frame_row.pack_forget()
+                self.estimate_label.pack_forget()
+                self.options_message_label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
+
+        if "quality_options" in changed:
+            selected = set(self.selected_qualities())
+            self.quality_list.delete(0, tk.END)
+            for index, option in enumerate(view_model.quality_options):
+                self.quality_list.insert(tk.END, option)
+                if option.split(' - ')[0] in selected:
+                    self.quality_list.selection_set(index)
+            if view_model.quality_options and not self.quality_list.curselection():
+                self.quality_list.selection_set(0)
+
+        if view_model.options_visible and changed & {"options_visible", "quality_options"}:
+            self.update_estimate()
+
+    def update_estimate(self):
+        """Show the size and time estimate of the selected qualities before anything is downloaded."""
+        if self.defer_to_main_thread(self.update_estimate):
+            return
+        if self.state.state != "fetched":
+            return
+        summary, _ = self.video_controller.estimate_download(
+            self.selected_qualities(),
+            self.path_entry_var.get(),
+            self.QUALITY_PRESETS,
+            download_playlist=self.playlist_mode_var.get(),
+            stream_mux=self.stream_mux_var.get(),
+        )
+        self.estimate_label.config(text=summary)
+
+    def update_video_info_frame(self, view_model : ViewModel, changed : set):
+        """Write the info lines into the label pool and toggle the playlist table."""
+        if "show_playlist_table" in changed:
+            if view_model.show_playlist_table:
+                self.playlist_table.flush()
+                self.playlist_table.pack(side=tk.TOP, fill=tk.BOTH, expand=True, pady=5)
             else:
-                title_label = ttk.Label(parent_frame, text=f"Title : {self.video_info.fetched_info.get('title', 'N/A')}")
-                title_label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
-
-                uploader_label = ttk.Label(parent_frame, text=f"Uploader : {self.video_info.fetched_info.get('uploader', 'N/A')}")
-                uploader_label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
-
-                duration_label = ttk.Label(parent_frame, text=f"Duration : {self.video_info.fetched_info.get('duration', 'N/A')} seconds")
-                duration_label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
-        elif self.state.state == "error":
-            error_label = ttk.Label(parent_frame, text="Fetch Failed")
-            error_label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
-        else:
-            info_label = ttk.Label(parent_frame, text="Enter a valid URL and fetch video info to see details.")
-            info_label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
-
-    def destroy_children(self, parent : ttk.LabelFrame):
-        """Recursively destroy all child widgets of the given parent widget."""
-        for child in parent.winfo_children():
-            if child.winfo_children():
-                self.destroy_children(child)
-            child.destroy()   
+                self.playlist_table.pack_forget()
+
+        if "info_lines" not in changed:
+            return
+
+        lines = view_model.info_lines
+        while len(self.info_labels) < len(lines):
+            self.info_labels.append(ttk.Label(self.info_lines_frame))
+
+        for index, label in enumerate(self.info_labels):
+            if index < len(lines):
+                if label.cget("text") != lines[index]:
+                    label.config(text=lines[index])
+                if not label.winfo_manager():
+                    label.pack(side=tk.TOP, fill=tk.X, expand=True, padx=5)
+            elif label.winfo_manager():
+                label.pack_forget()
 
     def fetch_video_info(self):
         """Fetch video information based on the URL entered by the user."""
@@ -216,10 +247,29 @@ class GUI:
         self.video_controller.fetch_video_info(as_playlist=self.playlist_mode_var.get())
 
     def revalitade_ui(self):
-        """Revalidate the UI based on the current state."""
-        self.setup_submit_button(self.url_frame)
-        self.setup_quality_options(self.download_options_frame)
-        self.setup_video_info_frame(self.video_info_frame)
+        """Revalidate the UI based on the current state, touching only the widgets whose content changed."""
+        if self.defer_to_main_thread(self.revalitade_ui):
+            return
+
+        view_model = ViewModel(self.state, self.video_info, self.playlist_mode_var.get(), self.QUALITY_PRESETS)
+        changed = view_model.diff(self.view_model)
+        self.view_model = view_model
+        if not changed:
+            return
+
+        self.update_submit_button(view_model, changed)
+        self.update_quality_options(view_model, changed)
+        self.update_video_info_frame(view_model, changed)
+
+    def defer_to_main_thread(self, callback, *args) -> bool:
+        """Schedule the callback on the Tk main loop when called from a worker thread.
+
+        Returns True if the call was deferred and the caller should return.
+        """
+        if threading.current_thread() is threading.main_thread():
+            return False
+        self.root.after(0, callback, *args)
+        return True
 
     def browse_directory(self):
         """Open a folder selection dialog and set the selected path to the provided variable."""
@@ -227,17 +277,46 @@ class GUI:
         if directory:
             self.path_entry_var.set(directory)
 
+    def selected_qualities(self) -> list:
+        """Get the preset keys of the selected qualities."""
+        return [self.quality_list.get(index).split(' - ')[0] for index in self.quality_list.curselection()]
+
     def download_video(self):
-        """Initiate the video download process based on the selected quality and download path."""
+        """Initiate the video download process based on the selected qualities and download path."""
+        qualities = self.selected_qualities()
+        if not qualities:
+            messagebox.showwarning("No quality selected", "Select at least one quality to download.")
+            return
+
+        options = {
+            'download_playlist': self.playlist_mode_var.get(),
+            'stream_mux': self.stream_mux_var.get(),
+        }
+        if not self.video_controller.estimate_ready():
+            messagebox.showinfo("Estimating size", "The playlist size is still being estimated, try again in a moment.")
+            return
+
+        # Admit the job against the estimate before anything is downloaded
+        summary, max_entries = self.video_controller.estimate_download(qualities, self.path_entry_var.get(), self.QUALITY_PRESETS, **options)
+        self.estimate_label.config(text=summary)
+        self.log(summary)
+        if max_entries == 0:
+            # Stay fetched so a smaller quality or another folder can be picked without fetching again
+            messagebox.showerror("Not enough disk space", summary)
+            return
+
         self.video_controller.start_download(
-            self.quality_combo.get().split(' - ')[0],
+            qualities,
             self.path_entry_var.get(),
             self.QUALITY_PRESETS,
-            download_playlist=self.playlist_mode_var.get(),
+            max_entries=max_entries,
+            **options,
         )
 
     def download_complete(self):
         """Handle actions to be taken after download is complete."""
+        if self.defer_to_main_thread(self.download_complete):
+            return
         messagebox.showinfo("Download Complete", "The video has been downloaded successfully!")
         self.state.state = "downloaded"
         self.revalitade_ui()
@@ -247,18 +326,24 @@ class GUI:
         self.state.state = "init"
         self.video_info.url = None
         self.video_info.fetched_info = {}
+        self.video_info.sampled_entries = []
+        self.playlist_items.load([])
         self.url_var.set("")
         self.playlist_mode_var.set(False)
         self.revalitade_ui()
 
     def show_error(self, message):
         """Display an error message to the user."""
+        if self.defer_to_main_thread(self.show_error, message):
+            return
         messagebox.showerror("Error", message)
         self.state.state = "error"
         self.revalitade_ui()
 
     def log(self, message):
         """Append a message to the log text widget."""
+        if self.defer_to_main_thread(self.log, message):
+            return
         self.log_text.config(state=tk.NORMAL)
         self.log_text.insert(tk.END, message + "\n")
         self.log_text.config(state=tk.DISABLED)
@@ -1,8 +1,23 @@
+import argparse
+import profiling
 from gui import GUI
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Apilage Downloader")
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help=f"write cProfile dumps and memory summaries for every job to DIR (or set {profiling.PROFILE_ENV_VAR})",
+    )
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    if args.profile:
+        profiling.enable(args.profile)
+
     print("Starting Apilage Downloader...")
     GUI()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,110 @@
+import threading
+
+class PlaylistItems:
+    """Per-entry rows of a fetched playlist.
+
+    Worker threads queue field updates with `update`; the GUI drains them in
+    batches with `apply_pending`, so a burst of progress hooks costs one redraw.
+    """
+
+    VALID_STATUSES = ("queued", "downloading", "done", "failed", "skipped")
+
+    def __init__(self):
+        self._rows: list[dict] = []
+        self._position_by_id: dict = {}
+        self._pending: dict[int, dict] = {}
+        self._reloaded = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def window(self, start: int, count: int):
+        """Get copies of up to count rows from start, read together with the total.
+
+        The start is clamped so the window stays full. Returns (start, rows, total)
+        from one consistent view, even if `load` swaps the rows concurrently.
+        """
+        with self._lock:
+            total = len(self._rows)
+            start = max(0, min(start, total - count))
+            return start, [dict(row) for row in self._rows[start:start + count]], total
+
+    def load(self, entries: list):
+        """Replace all rows with the entries of a freshly fetched playlist."""
+        rows = []
+        position_by_id = {}
+        for position, entry in enumerate(entries or []):
+            entry = entry or {}
+            rows.append({
+                'index': entry.get('playlist_index') or position + 1,
+                'title': entry.get('title') or entry.get('id') or 'N/A',
+                'format': '',
+                'size': None,
+                'speed': None,
+                'status': 'queued',
+            })
+            if entry.get('id'):
+                position_by_id[entry['id']] = position
+
+        with self._lock:
+            self._rows = rows
+            self._position_by_id = position_by_id
+            self._pending = {}
+            self._reloaded = True
+
+    def reset(self, format_label: str = ''):
+        """Mark every row as queued for a new download with the chosen format."""
+        with self._lock:
+            for position in range(len(self._rows)):
+                self._pending[position] = {'format': format_label, 'size': None, 'speed': None, 'status': 'queued'}
+
+    def position_of(self, item_id=None, playlist_index=None):
+        """Resolve a yt-dlp entry id or 1-based playlist index to a row position."""
+        if item_id is not None and item_id in self._position_by_id:
+            return self._position_by_id[item_id]
+        if playlist_index is not None:
+            try:
+                position = int(playlist_index) - 1
+            except (ValueError, TypeError):
+                return None
+            if 0 <= position < len(self._rows):
+                return position
+        return None
+
+    def update(self, item_id=None, playlist_index=None, **fields):
+        """Queue field changes for one row; unknown entries are ignored."""
+        if 'status' in fields and fields['status'] not in self.VALID_STATUSES:
+            raise ValueError(f"Invalid status: {fields['status']}. Must be one of {self.VALID_STATUSES}")
+
+        with self._lock:
+            position = self.position_of(item_id, playlist_index)
+            if position is None:
+                return
+            self._pending.setdefault(position, {}).update(fields)
+
+    def finish(self):
+        """Close out a download run: rows that never completed are marked failed."""
+        with self._lock:
+            for position, row in enumerate(self._rows):
+                status = self._pending.get(position, {}).get('status', row['status'])
+                if status in ("queued", "downloading"):
+                    self._pending.setdefault(position, {}).update({'status': 'failed', 'speed': None})
+
+    def apply_pending(self):
+        """Apply queued updates to the rows.
+
+        Returns None when the rows were reloaded and everything must be redrawn,
+        otherwise the set of positions whose values changed.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            reloaded, self._reloaded = self._reloaded, False
+            changed = set()
+            for position, fields in pending.items():
+                row = self._rows[position]
+                for key, value in fields.items():
+                    if row.get(key) != value:
+                        row[key] = value
+                        changed.add(position)
+        return None if reloaded else changed
@@ -46,4 +46,14 @@ class VideoInfo:
     @fetched_info.setter
     def fetched_info(self, info: dict):
         """Set fetched video information."""
-        self._fetched_info = info
\ No newline at end of file
+        self._fetched_info = info
+
+    @property
+    def sampled_entries(self) -> list:
+        """Get the fully extracted playlist entries used for size estimates."""
+        return getattr(self, "_sampled_entries", [])
+
+    @sampled_entries.setter
+    def sampled_entries(self, entries: list):
+        """Set the fully extracted playlist entries used for size estimates."""
+        self._sampled_entries = entries
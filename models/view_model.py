@@ -0,0 +1,84 @@
+from models.state import State
+from models.video_info import VideoInfo
+
+class ViewModel:
+    """Snapshot of everything the GUI displays, derived from the current state."""
+
+    FIELDS = ("submit_mode", "download_text", "info_lines", "show_playlist_table", "options_visible", "options_message", "quality_options")
+
+    # States in which the fetched info stays on screen
+    HAS_INFO_STATES = ("fetched", "downloading", "downloaded")
+
+    def __init__(self, state : State, video_info : VideoInfo, playlist_mode : bool, quality_presets : dict):
+        self.submit_mode = "download" if state.state == "fetched" else "fetch"
+        self.download_text = "Download Playlist" if playlist_mode else "Download"
+        self.info_lines = self._build_info_lines(state, video_info)
+        self.show_playlist_table = state.state in self.HAS_INFO_STATES and video_info.fetched_info.get('_type') == 'playlist'
+        self.options_visible = state.state == "fetched"
+        self.options_message = self._build_options_message(state)
+        self.quality_options = self._build_quality_options(state, video_info, playlist_mode, quality_presets)
+
+    def diff(self, other) -> set:
+        """Return the names of the fields that differ from another view model."""
+        if other is None:
+            return set(self.FIELDS)
+        return {field for field in self.FIELDS if getattr(self, field) != getattr(other, field)}
+
+    @staticmethod
+    def _build_info_lines(state : State, video_info : VideoInfo) -> tuple:
+        """Build the lines shown in the video info frame."""
+        if state.state == "fetching":
+            return ("Loading...",)
+        if state.state == "error":
+            return ("Fetch Failed",)
+        if state.state not in ViewModel.HAS_INFO_STATES:
+            return ("Enter a valid URL and fetch video info to see details.",)
+
+        info = video_info.fetched_info
+        if info.get('_type') == 'playlist':
+            entries = info.get('entries') or []
+            return (
+                "Mode : Playlist",
+                f"Playlist : {info.get('title', 'N/A')}",
+                f"Items : {len(entries)}",
+                f"Uploader : {info.get('uploader', 'N/A')}",
+            )
+        return (
+            "Mode : Video",
+            f"Title : {info.get('title', 'N/A')}",
+            f"Uploader : {info.get('uploader', 'N/A')}",
+            f"Duration : {info.get('duration', 'N/A')} seconds",
+        )
+
+    @staticmethod
+    def _build_options_message(state : State) -> str:
+        """Build the placeholder text shown when no download options are available."""
+        if state.state == "fetching":
+            return "Loading..."
+        if state.state == "error":
+            return "Fetch Failed"
+        return "Enter a valid URL and fetch video info to see quality options."
+
+    @staticmethod
+    def _build_quality_options(state : State, video_info : VideoInfo, playlist_mode : bool, quality_presets : dict) -> tuple:
+        """Build the quality combobox values for the fetched video or playlist."""
+        if state.state != "fetched":
+            return ()
+
+        # For playlist mode, use all presets because per-video formats vary inside a playlist.
+        if playlist_mode:
+            return tuple(f"{quality} - {specs['description']}" for quality, specs in quality_presets.items())
+
+        # Update quality options based on available formats
+        formats = video_info.fetched_info.get("formats", [])
+        available_heights = set()
+        for f in formats:
+            if f.get('vcodec') != 'none' and f.get('height'):
+                available_heights.add(f.get('height'))
+
+        max_height = max(available_heights, default=0)
+        return tuple(
+            f"{quality} - {specs['description']}"
+            for quality, specs in quality_presets.items()
+            if specs['height'] <= max_height
+        )
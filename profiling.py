@@ -0,0 +1,187 @@
+import cProfile
+import itertools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Optional
+
+PROFILE_ENV_VAR = "APILAGE_PROFILE_DIR"
+MEMORY_SAMPLE_INTERVAL = 0.5
+STACK_SAMPLE_INTERVAL = 0.01
+TOP_ALLOCATIONS = 10
+
+_profile_dir: Optional[str] = os.environ.get(PROFILE_ENV_VAR) or None
+_job_counter = itertools.count(1)
+_tracemalloc_users = 0
+# Only stop tracemalloc if this module started it (not e.g. PYTHONTRACEMALLOC)
+_tracemalloc_owned = False
+_tracemalloc_lock = threading.Lock()
+
+def enable(directory: str):
+    """Turn profiling on and write job dumps to the given directory."""
+    global _profile_dir
+    _profile_dir = directory
+
+def is_enabled() -> bool:
+    """Check if profiling is turned on."""
+    return bool(_profile_dir)
+
+class NullJob:
+    """Stand-in used when profiling is off; every hook is a no-op."""
+
+    def postprocessor_hook(self, d):
+        pass
+
+class ProfileJob:
+    """cProfile and tracemalloc data collected for one fetch or download job.
+
+    On Python 3.12 cProfile is built on the process-wide sys.monitoring, so a
+    profile records every thread (including GUI updates on the main thread)
+    and only one can be active at a time. A job that overlaps another one
+    falls back to wall time, sampled stacks and memory only. The folded
+    stacks are sampled from the job's own thread rather than rebuilt from
+    cProfile, whose caller graph mixes threads on 3.12. Post-processing runs
+    inside the download thread; its per-step wall time comes from yt-dlp's
+    postprocessor hooks.
+    """
+
+    def __init__(self, name: str, directory: str):
+        self.name = name
+        self.directory = directory
+        self.base_path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{next(_job_counter):03d}-{name}")
+        self.profiler = cProfile.Profile()
+        self.memory_samples = []
+        self.folded = {}
+        self.postprocessor_times = {}
+        self._postprocessor_started = {}
+        self._stop_sampling = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+
+    def postprocessor_hook(self, d):
+        """yt-dlp postprocessor hook that records the wall time of each step."""
+        key = d.get('postprocessor', 'unknown')
+        if d['status'] == 'started':
+            self._postprocessor_started[key] = time.perf_counter()
+        elif d['status'] == 'finished' and key in self._postprocessor_started:
+            elapsed = time.perf_counter() - self._postprocessor_started.pop(key)
+            self.postprocessor_times[key] = self.postprocessor_times.get(key, 0.0) + elapsed
+
+    def start(self):
+        # Enable the profiler first so a failure leaves nothing else to undo
+        try:
+            self.profiler.enable()
+        except ValueError:
+            self.profiler = None
+        _start_tracemalloc()
+        self.thread_id = threading.get_ident()
+        self.started_at = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self):
+        if self.profiler:
+            self.profiler.disable()
+        self.elapsed = time.perf_counter() - self.started_at
+        self._stop_sampling.set()
+        self._sampler.join()
+        self.snapshot = tracemalloc.take_snapshot()
+        self.peak = max((current for _, current in self.memory_samples), default=0)
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        _stop_tracemalloc()
+
+    def _sample(self):
+        """Sample the job thread's stack and the traced memory until the job stops."""
+        last_stack_sample = next_memory_sample = 0.0
+        while True:
+            offset = time.perf_counter() - self.started_at
+            if offset >= next_memory_sample:
+                current, _ = tracemalloc.get_traced_memory()
+                self.memory_samples.append((offset, current))
+                next_memory_sample = offset + MEMORY_SAMPLE_INTERVAL
+
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(_function_label((code.co_filename, code.co_firstlineno, code.co_name)))
+                    frame = frame.f_back
+                label = ";".join(reversed(stack))
+                # Weight each sample by the wall time since the previous one
+                microseconds = int((offset - last_stack_sample) * 1_000_000)
+                self.folded[label] = self.folded.get(label, 0) + microseconds
+            last_stack_sample = offset
+
+            if self._stop_sampling.wait(STACK_SAMPLE_INTERVAL):
+                return
+
+    def dump(self):
+        """Write the pstats dump, a folded-stack flamegraph file and the memory summary."""
+        os.makedirs(self.directory, exist_ok=True)
+        if self.profiler:
+            self.profiler.dump_stats(f"{self.base_path}.prof")
+
+        with open(f"{self.base_path}.folded", "w", encoding="utf-8") as f:
+            for stack, microseconds in self.folded.items():
+                f.write(f"{stack} {microseconds}\n")
+
+        with open(f"{self.base_path}-memory.txt", "w", encoding="utf-8") as f:
+            f.write(f"Job: {self.name}\n")
+            f.write(f"Wall time: {self.elapsed:.3f} s\n")
+            if not self.profiler:
+                f.write("cProfile: skipped, another job was already being profiled\n")
+            f.write(f"Peak traced memory: {self.peak / (1024 * 1024):.2f} MiB\n")
+            if self.postprocessor_times:
+                f.write("\nPost-processing:\n")
+                for key, seconds in self.postprocessor_times.items():
+                    f.write(f"  {key}: {seconds:.3f} s\n")
+            f.write(f"\nTop {TOP_ALLOCATIONS} allocation sites at job end:\n")
+            for stat in self.snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+                f.write(f"  {stat}\n")
+            f.write("\nSamples (seconds, bytes):\n")
+            for offset, current in self.memory_samples:
+                f.write(f"  {offset:.1f} {current}\n")
+
+def _start_tracemalloc():
+    """Start tracemalloc for the first active job."""
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+
+def _stop_tracemalloc():
+    """Stop tracemalloc once the last active job is done, if a job started it."""
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+def _function_label(func) -> str:
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+@contextmanager
+def profile_job(name: str):
+    """Profile the enclosed block when profiling is on; yields the job's hook object."""
+    if not is_enabled():
+        yield NullJob()
+        return
+
+    job = ProfileJob(name, _profile_dir)
+    job.start()
+    try:
+        yield job
+    finally:
+        job.stop()
+        try:
+            job.dump()
+        except OSError as e:
+            print(f"Error writing profile for {name}: {str(e)}")
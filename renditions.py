@@ -0,0 +1,106 @@
+import copy
+import os
+import yt_dlp
+from yt_dlp.postprocessor.ffmpeg import FFmpegPostProcessor
+
+# Route downloads through ffmpeg, which reads the video and audio URLs
+# together and muxes them straight into the final file without temp streams
+STREAM_MUX_OPTIONS = {'external_downloader': {'default': 'ffmpeg'}}
+STREAM_MUX_MULTI_QUALITY_NOTE = "Stream mux is not used for multiple qualities; renditions share a downloaded audio file."
+
+# Intermediate streams are named by format id so renditions that resolve to the same stream share it
+STREAM_TEMPLATE = '%(title)s.f%(format_id)s.%(ext)s'
+
+def unselected_info(info: dict) -> dict:
+    """Copy of an extracted info without the format selection extract_info merged into it.
+
+    A processed info carries the fields of its selected format at the top level,
+    including requested_formats, which yt-dlp keeps downloading whatever format
+    is requested when the info is processed again.
+    """
+    format_keys = {key for fmt in info.get('formats') or [] for key in fmt}
+    return {
+        key: copy.deepcopy(value) for key, value in info.items()
+        if key not in format_keys and not key.startswith('requested_')
+    }
+
+class RenditionExporter:
+    """Export several qualities of one video from a single extraction.
+
+    The audio stream is downloaded once and every selected video stream is
+    muxed against it, instead of running a full bestvideo+bestaudio download
+    per quality.
+    """
+
+    def __init__(self, ydl_params: dict, quality_presets: dict, log=print):
+        self.ydl_params = ydl_params
+        self.quality_presets = quality_presets
+        self.log = log
+
+    def export(self, info: dict, qualities: list) -> list:
+        """Download and mux every quality for an extracted video; returns the output paths."""
+        qualities = sorted(qualities, key=lambda quality: self.quality_presets[quality]['height'], reverse=True)
+        output_dir = os.path.dirname(self.ydl_params['outtmpl']) or '.'
+        stream_template = os.path.join(output_dir, STREAM_TEMPLATE)
+        intermediate_files = set()
+        outputs = []
+
+        ydl = yt_dlp.YoutubeDL(self.ydl_params)
+        try:
+            audio = self._download_stream(info, 'bestaudio', stream_template)
+            if audio:
+                intermediate_files.add(audio['filepath'])
+            else:
+                self.log("No separate audio stream, falling back to combined formats.")
+
+            seen_formats = {}
+            for quality in qualities:
+                height = self.quality_presets[quality]['height']
+                spec = f'bestvideo[height<={height}]/best[height<={height}]' if audio else f'best[height<={height}]'
+                video = self._download_stream(info, spec, stream_template)
+                if not video:
+                    self.log(f"No stream available for {quality}, skipping.")
+                    continue
+                if video['format_id'] in seen_formats:
+                    self.log(f"{quality} resolves to the same stream as {seen_formats[video['format_id']]}, skipping.")
+                    continue
+                seen_formats[video['format_id']] = quality
+                intermediate_files.add(video['filepath'])
+
+                has_audio = video.get('acodec') not in (None, 'none')
+                # Downloaded format entries only carry format fields, so name the output from the full info
+                output_path = ydl.prepare_filename({**info, **video, 'ext': 'mp4' if audio and not has_audio else video['ext']})
+
+                if audio and not has_audio:
+                    self.log(f"Muxing {quality} with shared audio...")
+                    FFmpegPostProcessor(ydl).run_ffmpeg_multiple_files(
+                        [video['filepath'], audio['filepath']],
+                        output_path,
+                        ['-c', 'copy', '-map', '0:v:0', '-map', '1:a:0'],
+                    )
+                else:
+                    os.replace(video['filepath'], output_path)
+                    intermediate_files.discard(video['filepath'])
+                outputs.append(output_path)
+                self.log(f"Saved {quality} to {output_path}")
+        finally:
+            ydl.close()
+            for path in intermediate_files:
+                if os.path.exists(path):
+                    os.remove(path)
+
+        return outputs
+
+    def _download_stream(self, info: dict, spec: str, stream_template: str):
+        """Download one format of an already extracted video, or return None if none matches."""
+        params = dict(self.ydl_params, format=spec, outtmpl=stream_template, ignoreerrors=False)
+        params.pop('merge_output_format', None)
+        with yt_dlp.YoutubeDL(params) as ydl:
+            try:
+                result = ydl.process_ie_result(unselected_info(info), download=True)
+            except (yt_dlp.utils.DownloadError, yt_dlp.utils.ExtractorError) as e:
+                if 'Requested format is not available' in str(e):
+                    return None
+                raise
+        downloads = result.get('requested_downloads') or []
+        return downloads[0] if downloads else None
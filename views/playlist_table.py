@@ -0,0 +1,106 @@
+import tkinter as tk
+from tkinter import ttk
+from models.playlist_items import PlaylistItems
+from estimator import format_bytes
+
+class PlaylistTable(ttk.Frame):
+    """Virtualized Treeview over PlaylistItems.
+
+    The Treeview only ever holds one item per visible line. Scrolling rewrites
+    those items from the backing rows, so the cost of a redraw depends on the
+    table height, not on the playlist length.
+    """
+
+    COLUMNS = {
+        'index':  {'heading': '#',      'width': 50,  'anchor': tk.E},
+        'title':  {'heading': 'Title',  'width': 320, 'anchor': tk.W},
+        'format': {'heading': 'Format', 'width': 90,  'anchor': tk.W},
+        'size':   {'heading': 'Size',   'width': 80,  'anchor': tk.E},
+        'speed':  {'heading': 'Speed',  'width': 90,  'anchor': tk.E},
+        'status': {'heading': 'Status', 'width': 90,  'anchor': tk.W},
+    }
+    FLUSH_INTERVAL_MS = 250
+
+    def __init__(self, parent, items : PlaylistItems, height : int = 10):
+        super().__init__(parent)
+        self.items = items
+        self.height = height
+        self.top = 0
+
+        self.tree = ttk.Treeview(self, columns=tuple(self.COLUMNS), show="headings", height=height, selectmode="none")
+        for column, specs in self.COLUMNS.items():
+            self.tree.heading(column, text=specs['heading'])
+            self.tree.column(column, width=specs['width'], anchor=specs['anchor'], stretch=column == 'title')
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # Mouse wheel (Windows/macOS use <MouseWheel>, X11 uses buttons 4 and 5)
+        self.tree.bind("<MouseWheel>", lambda event: self.scroll_to(self.top - (1 if event.delta > 0 else -1) * 3))
+        self.tree.bind("<Button-4>", lambda event: self.scroll_to(self.top - 3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_to(self.top + 3))
+
+        self.render()
+        self.after(self.FLUSH_INTERVAL_MS, self.poll)
+
+    def poll(self):
+        """Flush pending updates on a fixed interval while the table exists."""
+        # Schedule first so one failed flush cannot stop the updates for good
+        self.after(self.FLUSH_INTERVAL_MS, self.poll)
+        self.flush()
+
+    def flush(self):
+        """Apply the batched row updates and redraw the visible window if they touch it."""
+        changed = self.items.apply_pending()
+        if changed is None:
+            self.top = 0
+            self.render()
+        elif any(self.top <= position < self.top + self.height for position in changed):
+            self.render()
+
+    def render(self):
+        """Rebuild the visible window of rows and sync the scrollbar."""
+        self.top, rows, total = self.items.window(self.top, self.height)
+        children = self.tree.get_children()
+        for iid in children[len(rows):]:
+            self.tree.delete(iid)
+        for line in range(len(children), len(rows)):
+            self.tree.insert("", tk.END, iid=f"line{line}")
+
+        for line, row in enumerate(rows):
+            self.render_row(line, row)
+        self.update_scrollbar(total)
+
+    def render_row(self, line : int, row : dict):
+        """Write one row into the Treeview line that displays it."""
+        self.tree.item(f"line{line}", values=(
+            row['index'],
+            row['title'],
+            row['format'],
+            format_bytes(row['size']) if row['size'] else "",
+            f"{format_bytes(row['speed'])}/s" if row['speed'] else "",
+            row['status'],
+        ))
+
+    def scroll_to(self, top : int):
+        """Move the visible window so it starts at the given row position."""
+        top = max(0, min(top, len(self.items) - self.height))
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        """Translate scrollbar commands into a new window position."""
+        if action == "moveto":
+            self.scroll_to(round(float(amount) * len(self.items)))
+        elif action == "scroll":
+            step = self.height if unit == "pages" else 1
+            self.scroll_to(self.top + int(amount) * step)
+
+    def update_scrollbar(self, total : int):
+        """Size the scrollbar thumb to the visible fraction of the playlist."""
+        if total <= self.height:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.top / total, (self.top + self.height) / total)